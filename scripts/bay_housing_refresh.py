@@ -1,9 +1,18 @@
 #!/usr/bin/env python3
 import argparse
+import concurrent.futures
 import datetime as dt
+import functools
+import hashlib
+import http.client
+import io
 import json
 import os
 import re
+import select
+import sys
+import threading
+import time
 import urllib.parse
 import urllib.request
 from urllib.error import HTTPError
@@ -11,7 +20,14 @@ from typing import Dict, List
 
 NOTION_API_VERSION = "2022-06-28"
 DEFAULT_NOTION_DATABASE_ID = "30dd08d008dd80b1a614d874a5db8468"
+NOTION_FILTER_BATCH = 100
+NOTION_RATE_LIMIT = 3.0  # requests/second, Notion's documented average per integration
+NOTION_WRITE_WORKERS = 3
+NOTION_MAX_RETRIES = 5
+NOTION_RETRY_CODES = {429, 503}
 OUT_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "bay_housing_latest.json")
+# remembers a database whose schema was already ensured; delete to force a re-check
+NOTION_SCHEMA_CACHE_PATH = os.path.join(os.path.dirname(OUT_PATH), ".notion_schema_cache.json")
 
 MOVE_WINDOW = "Aug-Sep 2026"
 MAX_RENT = 8000
@@ -19,6 +35,7 @@ STRETCH_MAX = 9000
 MIN_BEDS = 2
 MIN_BATHS = 2
 ALLOWED_PROPERTY_TYPES = {"house", "townhouse"}
+RAW_EXCERPT_CHARS = 120
 
 AREAS = ["Woodside", "Portola Valley", "Los Altos Hills", "Saratoga", "Los Gatos", "Cupertino"]
 
@@ -34,35 +51,168 @@ SEARCH_URLS = {
     ],
 }
 
+LISTING_URL_PATTERNS = {
+    "zillow": r'https://www\\.zillow\\.com/(?:homedetails|apartments)/[^"\\s<>]+',
+    "redfin": r'https://www\\.redfin\\.com/CA/[^"\\s<>]+',
+    "realtor": r'/rentals/details/[^"\\s<>?]+'
+}
+
+MAX_URLS_PER_PAGE = 100
+FETCH_WORKERS = 8
+FETCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+_LISTING_URL_RES = {source: re.compile(pattern) for source, pattern in LISTING_URL_PATTERNS.items()}
+_PRICE_RE = re.compile(r"\$\s*([0-9][0-9,]*)")
+_BEDS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:bd|beds?)")
+_BATHS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:ba|baths?)")
+_STREET_RE = re.compile(r"\b\d{1,6}\s+[a-z0-9].+", re.I)
+_HOMEDET_RE = re.compile(r"/homedetails/([^/]+)/")
+_STATE_RE = re.compile(r"\bCA\b")
+_DETAILS_RE = re.compile(r"/details/([^/?]+)")
+_SCHEME_RE = re.compile(r"https?://")
+_PROP_NAME_RE = re.compile(r"/(apartments|details)/([^/?]+)")
+_PETS_RE = re.compile(r"pets?ok|pet friendly|dogs?")
+_PARK_RE = re.compile(r"parking|garage")
+
+
+class _SpaceOutTable(dict):
+    # str.translate table that maps any code point not listed to a space
+    def __missing__(self, key):
+        return " "
+
+
+_NORMALIZE_TABLE = _SpaceOutTable((ord(c), c) for c in "abcdefghijklmnopqrstuvwxyz0123456789 ")
+
+# (needle, canonical city) in priority order; AREAS win over nearby cities
+_CITY_NEEDLES = [(a.lower(), a) for a in AREAS] + [
+    ("redwood city", "Redwood City"),
+    ("san jose", "San Jose"),
+    ("mountain view", "Mountain View"),
+    ("sunnyvale", "Sunnyvale"),
+]
+# (price band, beds band, baths ok, dog friendly, parking) -> base points for score()
+# price band: 0 within MAX_RENT, 1 within STRETCH_MAX, 2 over or unknown; beds band: 2 for 3+, 1 for 2
+_SCORE_TABLE = {
+    (price_band, beds_band, baths_ok, dog, parking): float((4, 2, 0)[price_band] + beds_band + baths_ok + 2 * dog + 2 * parking)
+    for price_band in range(3)
+    for beds_band in range(3)
+    for baths_ok in (False, True)
+    for dog in (False, True)
+    for parking in (False, True)
+}
+_NATURE_KEYWORDS = ("foothill", "hills", "ridge", "trail", "open space", "park", "mountain")
+_NATURE_AREA_KEYWORDS = ("woodside", "portola valley", "los altos hills", "saratoga", "los gatos")
+_COMMUTE_TIERS = (
+    (("los altos hills", "cupertino", "saratoga"), 4),
+    (("los gatos", "woodside", "portola valley"), 3),
+    (("mountain view", "sunnyvale"), 5),
+)
+
+
+_HTTP_LOCAL = threading.local()
+_REDIRECT_CODES = {301, 302, 303, 307, 308}
+# safe to replay after an ambiguous connection failure; Notion PATCH sets absolute values
+_REPLAYABLE_METHODS = {"GET", "HEAD", "PATCH"}
+
+
+def _http_connections() -> Dict[tuple, http.client.HTTPConnection]:
+    # http.client connections are not thread-safe, so keep one per (thread, host)
+    return _HTTP_LOCAL.__dict__.setdefault("conns", {})
+
+
+def _drop_connection(key: tuple) -> None:
+    conn = _http_connections().pop(key, None)
+    if conn is not None:
+        conn.close()
+
+
+def _connection_dropped(conn: http.client.HTTPConnection) -> bool:
+    # an idle keep-alive socket that polls readable has been closed (or reset) by the server
+    if conn.sock is None:
+        return False
+    try:
+        return bool(select.select([conn.sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+def _uses_proxy(parts: urllib.parse.SplitResult) -> bool:
+    return parts.scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(parts.hostname or "")
+
+
+def _urlopen_request(method: str, url: str, headers: Dict[str, str], data: bytes | None, timeout: float) -> bytes:
+    req = urllib.request.Request(url, method=method, headers=headers, data=data)
+    with urllib.request.urlopen(req, timeout=timeout) as r:
+        return r.read()
+
+
+# Keep-alive replacement for urlopen; non-2xx responses still raise urllib's HTTPError.
+# Proxied hosts (HTTP(S)_PROXY) go through urlopen so its ProxyHandler still applies.
+def http_request(method: str, url: str, headers: Dict[str, str], data: bytes | None = None, timeout: float = 30) -> bytes:
+    for _ in range(6):
+        parts = urllib.parse.urlsplit(url)
+        if _uses_proxy(parts):
+            return _urlopen_request(method, url, headers, data, timeout)
+        target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        key = (parts.scheme, parts.netloc)
+        for attempt in (0, 1):
+            conns = _http_connections()
+            if key in conns and _connection_dropped(conns[key]):
+                _drop_connection(key)
+            reused = key in conns
+            if not reused:
+                cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+                conns[key] = cls(parts.netloc, timeout=timeout)
+            sent = False
+            try:
+                conns[key].request(method, target, body=data, headers=headers)
+                sent = True
+                resp = conns[key].getresponse()
+                body = resp.read()
+                break
+            except Exception as e:
+                _drop_connection(key)
+                # a reused socket may have been closed server-side; retry once on a fresh one, but
+                # only when replaying cannot duplicate a write (e.g. a POST that already went out)
+                stale = reused and isinstance(e, (http.client.HTTPException, ConnectionError))
+                if attempt or not stale or (sent and method not in _REPLAYABLE_METHODS):
+                    raise
+        if resp.will_close:
+            _drop_connection(key)
+
+        location = resp.getheader("Location")
+        if method == "GET" and resp.status in _REDIRECT_CODES and location:
+            url = urllib.parse.urljoin(url, location)
+            continue
+        if not 200 <= resp.status < 300:
+            raise HTTPError(url, resp.status, resp.reason, resp.headers, io.BytesIO(body))
+        return body
+    raise HTTPError(url, resp.status, "too many redirects", resp.headers, io.BytesIO(body))
+
 
 def fetch_html(url: str) -> str:
-    req = urllib.request.Request(
-        url,
-        headers={
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9",
-        },
-    )
-    with urllib.request.urlopen(req, timeout=25) as r:
-        return r.read().decode("utf-8", "ignore")
+    return http_request("GET", url, FETCH_HEADERS, timeout=25).decode("utf-8", "ignore")
 
 
 def norm_price(s: str) -> float | None:
-    m = re.search(r"\$\s*([0-9][0-9,]*)", s or "")
+    m = _PRICE_RE.search(s or "")
     if not m:
         return None
     return float(m.group(1).replace(",", ""))
 
 
-def parse_beds_baths(text: str) -> tuple[float | None, float | None]:
-    t = (text or "").lower()
-    b = re.search(r"(\d+(?:\.\d+)?)\s*(?:bd|beds?)", t)
-    ba = re.search(r"(\d+(?:\.\d+)?)\s*(?:ba|baths?)", t)
+def parse_beds_baths(text_l: str) -> tuple[float | None, float | None]:
+    t = text_l or ""
+    b = _BEDS_RE.search(t)
+    ba = _BATHS_RE.search(t)
     return (float(b.group(1)) if b else None, float(ba.group(1)) if ba else None)
 
 
-def infer_property_type(raw: str, url: str, name: str = "") -> str:
-    t = f"{raw} {url} {name}".lower()
+def infer_property_type(raw_l: str, url_l: str, name_l: str = "") -> str:
+    t = f"{raw_l} {url_l} {name_l}"
     if "townhouse" in t or "townhome" in t:
         return "townhouse"
     if "single family" in t or "house for rent" in t or "/homedetails/" in t:
@@ -75,67 +225,64 @@ def infer_property_type(raw: str, url: str, name: str = "") -> str:
 
 
 def normalize_text(s: str) -> str:
-    s = re.sub(r"[^a-z0-9 ]+", " ", (s or "").lower())
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    # one C-level translate pass, then split/join collapses the runs of spaces
+    return " ".join((s or "").lower().translate(_NORMALIZE_TABLE).split())
 
 
 def likely_street_address(s: str) -> bool:
     s = (s or "")
-    return bool(re.search(r"\b\d{1,6}\s+[a-z0-9].+", s, flags=re.I))
+    return bool(_STREET_RE.search(s))
 
 
 def address_from_url(url: str) -> str:
     # Zillow home details: /homedetails/28-Meadow-Rd-Woodside-CA-94062/...
-    m = re.search(r"/homedetails/([^/]+)/", url)
+    m = _HOMEDET_RE.search(url)
     if m:
         slug = m.group(1)
         s = slug.replace("-", " ")
-        s = re.sub(r"\bCA\b", "CA", s)
+        s = _STATE_RE.sub("CA", s)
         return s
 
     # Realtor details path often contains address-like slug
-    m = re.search(r"/details/([^/?]+)", url)
+    m = _DETAILS_RE.search(url)
     if m:
         return m.group(1).replace("_", " ").replace("-", " ")
 
     return ""
 
 
-def infer_city(text: str) -> str:
-    t = (text or "").lower()
-    for area in AREAS:
-        if area.lower() in t:
-            return area
-    if "redwood city" in t:
-        return "Redwood City"
-    if "san jose" in t:
-        return "San Jose"
-    if "mountain view" in t:
-        return "Mountain View"
-    if "sunnyvale" in t:
-        return "Sunnyvale"
+def infer_city(text_l: str) -> str:
+    t = text_l or ""
+    for needle, city in _CITY_NEEDLES:
+        if needle in t:
+            return city
     return ""
 
 
-def nature_score(area: str, raw: str) -> float:
+@functools.lru_cache(maxsize=64)
+def _area_nature_hits(area: str) -> tuple[bool, bool]:
+    # area is one of a handful of city names, so its half of the scan is memoized
+    a = area.lower()
+    return any(k in a for k in _NATURE_KEYWORDS), any(k in a for k in _NATURE_AREA_KEYWORDS)
+
+
+def nature_score(area: str, raw_l: str) -> float:
     score = 0.0
-    text = f"{area} {raw}".lower()
-    if any(k in text for k in ["foothill", "hills", "ridge", "trail", "open space", "park", "mountain"]):
+    scenic_area, named_area = _area_nature_hits(area or "")
+    text = raw_l or ""
+    if scenic_area or any(k in text for k in _NATURE_KEYWORDS):
         score += 3
-    if any(k in text for k in ["woodside", "portola valley", "los altos hills", "saratoga", "los gatos"]):
+    if named_area or any(k in text for k in _NATURE_AREA_KEYWORDS):
         score += 2
     return score
 
 
+@functools.lru_cache(maxsize=32)
 def commute_placeholder_score(area: str) -> float:
     a = (area or "").lower()
-    if any(k in a for k in ["los altos hills", "cupertino", "saratoga"]):
-        return 4
-    if any(k in a for k in ["los gatos", "woodside", "portola valley"]):
-        return 3
-    if any(k in a for k in ["mountain view", "sunnyvale"]):
-        return 5
+    for keywords, tier in _COMMUTE_TIERS:
+        if any(k in a for k in keywords):
+            return tier
     return 2
 
 
@@ -150,31 +297,20 @@ def canonical_key(item: Dict) -> str:
         return f"namecity:{name}|{city}"
 
     # fallback
-    url_key = normalize_text(re.sub(r"https?://", "", item.get("url", "")))
+    url_key = normalize_text(_SCHEME_RE.sub("", item.get("url", "")))
     return f"url:{url_key[:140]}"
 
 
 def score(item: Dict) -> float:
-    s = 0.0
     price = item.get("price")
     beds = item.get("beds")
     baths = item.get("baths")
 
-    if price is not None:
-        if price <= MAX_RENT:
-            s += 4
-        elif price <= STRETCH_MAX:
-            s += 2
-    if beds is not None:
-        s += 2 if beds >= 3 else 1 if beds >= 2 else 0
-    if baths is not None and baths >= 2:
-        s += 1
-
-    if item.get("dog_friendly") == "yes":
-        s += 2
-    if item.get("parking") == "yes":
-        s += 2
+    price_band = 2 if price is None else 0 if price <= MAX_RENT else 1 if price <= STRETCH_MAX else 2
+    beds_band = 0 if beds is None else 2 if beds >= 3 else 1 if beds >= 2 else 0
+    baths_ok = baths is not None and baths >= 2
 
+    s = _SCORE_TABLE[(price_band, beds_band, baths_ok, item.get("dog_friendly") == "yes", item.get("parking") == "yes")]
     s += item.get("nature_score", 0)
     s += item.get("commute_score", 0)
     return round(s, 2)
@@ -195,36 +331,41 @@ def passes_hard_filters(item: Dict) -> bool:
 
 
 def parse_candidates(source: str, html: str, base_url: str) -> List[Dict]:
-    patterns = {
-        "zillow": r'https://www\\.zillow\\.com/(?:homedetails|apartments)/[^"\\s<>]+',
-        "redfin": r'https://www\\.redfin\\.com/CA/[^"\\s<>]+',
-        "realtor": r'/rentals/details/[^"\\s<>?]+'
-    }
-
-    p = re.compile(patterns[source])
-    urls = list(dict.fromkeys(p.findall(html)))[:100]
+    p = _LISTING_URL_RES[source]
+    # first occurrence of each URL with its start offset; stop scanning once the cap is reached
+    seen = set()
+    found: List[tuple[str, int]] = []
+    for m in p.finditer(html):
+        u = m.group(0)
+        if u in seen:
+            continue
+        seen.add(u)
+        found.append((u, m.start()))
+        if len(found) >= MAX_URLS_PER_PAGE:
+            break
 
     rows: List[Dict] = []
-    for u in urls:
+    for u, start in found:
+        # sample surrounding text for lightweight parsing
+        raw = html[start:start + len(u) + 550][:900]
+
         if source == "realtor" and u.startswith("/"):
             u = "https://www.realtor.com" + u
 
-        # sample surrounding text for lightweight parsing
-        m = re.search(re.escape(u) + r".{0,550}", html, flags=re.DOTALL)
-        raw = (m.group(0) if m else "")[:900]
-
-        price = norm_price(raw)
-        beds, baths = parse_beds_baths(raw)
+        # lowercase the sample once; the text helpers below all take lowercased input
+        raw_l = raw.lower()
+        price = norm_price(raw_l)
+        beds, baths = parse_beds_baths(raw_l)
         address = address_from_url(u)
-        city = infer_city(f"{address} {raw} {base_url}")
+        city = infer_city(f"{address.lower()} {raw_l} {base_url.lower()}")
 
         # property name heuristic from URL slug
         prop_name = ""
-        mname = re.search(r"/(apartments|details)/([^/?]+)", u)
+        mname = _PROP_NAME_RE.search(u)
         if mname:
             prop_name = mname.group(2).replace("-", " ").replace("_", " ")
 
-        ptype = infer_property_type(raw, u, prop_name)
+        ptype = infer_property_type(raw_l, u.lower(), prop_name.lower())
 
         rows.append(
             {
@@ -238,11 +379,12 @@ def parse_candidates(source: str, html: str, base_url: str) -> List[Dict]:
                 "price": price,
                 "beds": beds,
                 "baths": baths,
-                "dog_friendly": "yes" if re.search(r"pets?ok|pet friendly|dogs?", raw, flags=re.I) else "maybe",
-                "parking": "yes" if re.search(r"parking|garage", raw, flags=re.I) else "maybe",
-                "nature_score": nature_score(city, raw),
+                "dog_friendly": "yes" if _PETS_RE.search(raw_l) else "maybe",
+                "parking": "yes" if _PARK_RE.search(raw_l) else "maybe",
+                "nature_score": nature_score(city, raw_l),
                 "commute_score": commute_placeholder_score(city),
-                "raw": raw,
+                # scoring above used the full sample; keep a short excerpt for debugging only
+                "raw": raw[:RAW_EXCERPT_CHARS],
             }
         )
 
@@ -274,21 +416,32 @@ def quality_assessment(item: Dict) -> tuple[str, str]:
 
 
 def merge_duplicates(items: List[Dict]) -> List[Dict]:
-    by_key: Dict[str, Dict] = {}
+    # canonical key -> index into the parallel lists below
+    keys: Dict[str, int] = {}
+    items_out: List[Dict] = []
+    provenance_sources: List[set] = []
+    provenance_urls: List[set] = []
+    provenance_ids: List[set] = []
     for item in items:
         key = canonical_key(item)
         item["canonical_key"] = key
         item["match_score"] = score(item)
-
-        if key not in by_key:
-            merged = dict(item)
-            merged["sources"] = sorted(list({item["source"]}))
-            merged["source_urls"] = [item["url"]]
-            merged["listing_ids"] = [item["listing_id"]]
-            by_key[key] = merged
+        # low-cardinality strings: share one object across listings from any caller
+        for fld in ("source", "city", "property_type"):
+            v = item.get(fld)
+            if isinstance(v, str):
+                item[fld] = sys.intern(v)
+
+        idx = keys.get(key)
+        if idx is None:
+            keys[key] = len(items_out)
+            items_out.append(dict(item))
+            provenance_sources.append({item["source"]})
+            provenance_urls.append({item["url"]})
+            provenance_ids.append({item["listing_id"]})
             continue
 
-        cur = by_key[key]
+        cur = items_out[idx]
         # preserve best-known numeric fields
         for fld in ["price", "beds", "baths"]:
             if cur.get(fld) is None and item.get(fld) is not None:
@@ -298,18 +451,30 @@ def merge_duplicates(items: List[Dict]) -> List[Dict]:
         if not cur.get("address") and item.get("address"):
             cur["address"] = item["address"]
 
-        # merge provenance
-        cur["sources"] = sorted(list(set(cur.get("sources", [])) | {item["source"]}))
-        cur["source_urls"] = sorted(list(set(cur.get("source_urls", [])) | {item["url"]}))
-        cur["listing_ids"] = sorted(list(set(cur.get("listing_ids", [])) | {item["listing_id"]}))
+        # merge provenance; sorted once per entry below
+        provenance_sources[idx].add(item["source"])
+        provenance_urls[idx].add(item["url"])
+        provenance_ids[idx].add(item["listing_id"])
 
         # choose higher score representative
         if item["match_score"] > cur.get("match_score", 0):
             for fld in ["property_name", "city", "property_type", "dog_friendly", "parking", "nature_score", "commute_score", "match_score"]:
                 cur[fld] = item.get(fld)
 
-    merged = list(by_key.values())
-    merged = [m for m in merged if passes_hard_filters(m)]
+    for idx, cur in enumerate(items_out):
+        cur["sources"] = sorted(provenance_sources[idx])
+        cur["source_urls"] = sorted(provenance_urls[idx])
+        cur["listing_ids"] = sorted(provenance_ids[idx])
+
+    # passes_hard_filters inlined (keep the two in sync); cheapest rejections first
+    merged = [
+        m
+        for m in items_out
+        if (m.get("property_type") or "unknown").lower() in ALLOWED_PROPERTY_TYPES
+        and not (m.get("price") is not None and m["price"] > STRETCH_MAX)
+        and not (m.get("beds") is not None and m["beds"] < MIN_BEDS)
+        and not (m.get("baths") is not None and m["baths"] < MIN_BATHS)
+    ]
     for m in merged:
         q, notes = quality_assessment(m)
         m["data_quality"] = q
@@ -318,23 +483,103 @@ def merge_duplicates(items: List[Dict]) -> List[Dict]:
     return merged
 
 
+class NotionHTTPError(RuntimeError):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+_NOTION_RATE_LOCK = threading.Lock()
+_notion_next_slot = 0.0
+
+
+def _notion_throttle() -> None:
+    # space requests from all threads evenly so the integration stays under NOTION_RATE_LIMIT
+    global _notion_next_slot
+    with _NOTION_RATE_LOCK:
+        now = time.monotonic()
+        wait = _notion_next_slot - now
+        _notion_next_slot = max(now, _notion_next_slot) + 1 / NOTION_RATE_LIMIT
+    if wait > 0:
+        time.sleep(wait)
+
+
+def _retry_delay(e: HTTPError, attempt: int) -> float:
+    try:
+        return float(e.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return min(0.5 * 2 ** attempt, 30.0)
+
+
 def notion_request(method: str, path: str, token: str, payload: dict | None = None):
-    req = urllib.request.Request(
-        f"https://api.notion.com{path}",
-        method=method,
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Notion-Version": NOTION_API_VERSION,
-            "Content-Type": "application/json",
-        },
-        data=(json.dumps(payload).encode("utf-8") if payload is not None else None),
-    )
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Notion-Version": NOTION_API_VERSION,
+        "Content-Type": "application/json",
+    }
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    for attempt in range(NOTION_MAX_RETRIES + 1):
+        _notion_throttle()
+        try:
+            body = http_request(method, f"https://api.notion.com{path}", headers, data, timeout=30)
+            return json.loads(body.decode("utf-8"))
+        except HTTPError as e:
+            if e.code in NOTION_RETRY_CODES and attempt < NOTION_MAX_RETRIES:
+                time.sleep(_retry_delay(e, attempt))
+                continue
+            body = e.read().decode("utf-8", "ignore")
+            raise NotionHTTPError(e.code, f"HTTP {e.code} {e.reason}: {body[:500]}")
+
+
+NOTION_SCHEMA = {
+    "Canonical Key": {"rich_text": {}},
+    "Sources": {"multi_select": {"options": [{"name": "zillow"}, {"name": "redfin"}, {"name": "realtor"}]}} ,
+    "Primary URL": {"url": {}},
+    "Address": {"rich_text": {}},
+    "City": {"rich_text": {}},
+    "Property Type": {"select": {"options": [{"name": "house"}, {"name": "townhouse"}, {"name": "apartment"}, {"name": "condo"}, {"name": "unknown"}]}} ,
+    "Home/Townhome Preferred": {"select": {"options": [{"name": "yes"}, {"name": "no"}]}} ,
+    "Price": {"number": {"format": "dollar"}},
+    "Beds": {"number": {"format": "number"}},
+    "Baths": {"number": {"format": "number"}},
+    "Dog Friendly": {"select": {"options": [{"name": "yes"}, {"name": "maybe"}, {"name": "no"}]}} ,
+    "Parking": {"select": {"options": [{"name": "yes"}, {"name": "maybe"}, {"name": "no"}]}} ,
+    "Move Window": {"rich_text": {}},
+    "Stretch": {"select": {"options": [{"name": "no"}, {"name": "yes"}]}} ,
+    "Commute Score": {"number": {"format": "number"}},
+    "Nature Score": {"number": {"format": "number"}},
+    "Match Score": {"number": {"format": "number"}},
+    "Data Quality": {"select": {"options": [{"name": "pass"}, {"name": "fail"}]}} ,
+    "Quality Notes": {"rich_text": {}},
+    "Last Seen": {"date": {}},
+}
+_NOTION_SCHEMA_HASH = hashlib.sha256(json.dumps(NOTION_SCHEMA, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def read_schema_cache() -> Dict:
     try:
-        with urllib.request.urlopen(req, timeout=30) as r:
-            return json.loads(r.read().decode("utf-8"))
-    except HTTPError as e:
-        body = e.read().decode("utf-8", "ignore")
-        raise RuntimeError(f"HTTP {e.code} {e.reason}: {body[:500]}")
+        with open(NOTION_SCHEMA_CACHE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_schema_cache(cache: Dict | None) -> None:
+    try:
+        if cache is None:
+            os.remove(NOTION_SCHEMA_CACHE_PATH)
+            return
+        with open(NOTION_SCHEMA_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+    except OSError:
+        pass  # the cache only saves a round-trip; never fail a sync over it
+
+
+def cached_title_prop_name(db_id: str) -> str | None:
+    cache = read_schema_cache()
+    if cache.get("db_id") == db_id and cache.get("wanted_hash") == _NOTION_SCHEMA_HASH and cache.get("title_prop_name"):
+        return cache["title_prop_name"]
+    return None
 
 
 def notion_ensure_schema(token: str, db_id: str) -> str:
@@ -342,41 +587,33 @@ def notion_ensure_schema(token: str, db_id: str) -> str:
     props = db.get("properties", {})
     title_prop_name = next((k for k, v in props.items() if v.get("type") == "title"), "Name")
 
-    wanted = {
-        "Canonical Key": {"rich_text": {}},
-        "Sources": {"multi_select": {"options": [{"name": "zillow"}, {"name": "redfin"}, {"name": "realtor"}]}} ,
-        "Primary URL": {"url": {}},
-        "Address": {"rich_text": {}},
-        "City": {"rich_text": {}},
-        "Property Type": {"select": {"options": [{"name": "house"}, {"name": "townhouse"}, {"name": "apartment"}, {"name": "condo"}, {"name": "unknown"}]}} ,
-        "Home/Townhome Preferred": {"select": {"options": [{"name": "yes"}, {"name": "no"}]}} ,
-        "Price": {"number": {"format": "dollar"}},
-        "Beds": {"number": {"format": "number"}},
-        "Baths": {"number": {"format": "number"}},
-        "Dog Friendly": {"select": {"options": [{"name": "yes"}, {"name": "maybe"}, {"name": "no"}]}} ,
-        "Parking": {"select": {"options": [{"name": "yes"}, {"name": "maybe"}, {"name": "no"}]}} ,
-        "Move Window": {"rich_text": {}},
-        "Stretch": {"select": {"options": [{"name": "no"}, {"name": "yes"}]}} ,
-        "Commute Score": {"number": {"format": "number"}},
-        "Nature Score": {"number": {"format": "number"}},
-        "Match Score": {"number": {"format": "number"}},
-        "Data Quality": {"select": {"options": [{"name": "pass"}, {"name": "fail"}]}} ,
-        "Quality Notes": {"rich_text": {}},
-        "Last Seen": {"date": {}},
-    }
-
-    missing = {k: v for k, v in wanted.items() if k not in props}
+    missing = {k: v for k, v in NOTION_SCHEMA.items() if k not in props}
     if missing:
         notion_request("PATCH", f"/v1/databases/{db_id}", token, {"properties": missing})
 
+    write_schema_cache({"db_id": db_id, "wanted_hash": _NOTION_SCHEMA_HASH, "title_prop_name": title_prop_name})
     return title_prop_name
 
 
-def notion_find_by_canonical_key(token: str, db_id: str, key: str):
-    payload = {"filter": {"property": "Canonical Key", "rich_text": {"equals": key}}, "page_size": 1}
-    res = notion_request("POST", f"/v1/databases/{db_id}/query", token, payload)
-    rows = res.get("results", [])
-    return rows[0]["id"] if rows else None
+def notion_find_by_canonical_keys(token: str, db_id: str, keys: List[str]) -> Dict[str, str]:
+    # one OR-filtered, paginated query per 100 keys instead of one query per listing
+    found: Dict[str, str] = {}
+    for i in range(0, len(keys), NOTION_FILTER_BATCH):
+        batch = keys[i:i + NOTION_FILTER_BATCH]
+        payload = {
+            "filter": {"or": [{"property": "Canonical Key", "rich_text": {"equals": k}} for k in batch]},
+            "page_size": 100,
+        }
+        while True:
+            res = notion_request("POST", f"/v1/databases/{db_id}/query", token, payload)
+            for page in res.get("results", []):
+                rich = page.get("properties", {}).get("Canonical Key", {}).get("rich_text", [])
+                key = "".join(x.get("plain_text", "") for x in rich)
+                found.setdefault(key, page["id"])
+            if not res.get("has_more"):
+                break
+            payload["start_cursor"] = res.get("next_cursor")
+    return found
 
 
 def notion_props(item: Dict, title_prop_name: str, seen_date: str) -> Dict:
@@ -413,28 +650,55 @@ def notion_props(item: Dict, title_prop_name: str, seen_date: str) -> Dict:
     }
 
 
+def notion_upsert_items(token: str, db_id: str, title_prop_name: str, seen_date: str, ready: List[Dict]) -> int:
+    existing = notion_find_by_canonical_keys(token, db_id, [item["canonical_key"] for item in ready])
+
+    def upsert(item: Dict) -> None:
+        page_id = existing.get(item["canonical_key"])
+        props = notion_props(item, title_prop_name, seen_date)
+        if page_id:
+            notion_request("PATCH", f"/v1/pages/{page_id}", token, {"properties": props})
+        else:
+            notion_request("POST", "/v1/pages", token, {"parent": {"database_id": db_id}, "properties": props})
+
+    # writes overlap their round-trips; notion_request keeps the overall rate in check
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=NOTION_WRITE_WORKERS)
+    try:
+        for fut in [pool.submit(upsert, item) for item in ready]:
+            fut.result()
+    finally:
+        # on the first failure, drop queued writes instead of pushing on
+        pool.shutdown(cancel_futures=True)
+    return len(ready)
+
+
 def sync_to_notion(items: List[Dict], db_id: str) -> str:
     token = os.getenv("NOTION_API_TOKEN", "").strip()
     if not token:
         return "Notion sync skipped: missing NOTION_API_TOKEN"
 
-    title_prop_name = notion_ensure_schema(token, db_id)
+    title_prop_name = cached_title_prop_name(db_id)
+    from_cache = title_prop_name is not None
+    if not from_cache:
+        title_prop_name = notion_ensure_schema(token, db_id)
     seen_date = dt.datetime.now(dt.timezone.utc).date().isoformat()
 
-    upserts = 0
-    skipped_quality = 0
-    for item in items:
-        if item.get("data_quality") != "pass":
-            skipped_quality += 1
-            continue
+    ready = [item for item in items if item.get("data_quality") == "pass"]
+    skipped_quality = len(items) - len(ready)
 
-        page_id = notion_find_by_canonical_key(token, db_id, item["canonical_key"])
-        props = notion_props(item, title_prop_name, seen_date)
-        if page_id:
-            notion_request("PATCH", f"/v1/pages/{page_id}", token, {"properties": props})
-        else:
-            notion_request("POST", "/v1/pages", token, {"parent": {"database_id": db_id}, "properties": props})
-        upserts += 1
+    for attempt in (0, 1):
+        try:
+            # the key lookup filters on a schema property too, so it sits inside the retry as well
+            upserts = notion_upsert_items(token, db_id, title_prop_name, seen_date, ready)
+            break
+        except Exception as e:
+            # the database may have been edited since the schema was cached; re-check next run
+            write_schema_cache(None)
+            if attempt or not from_cache or getattr(e, "code", None) != 400:
+                raise
+            # e.g. a property was deleted or renamed: ensure the schema now and retry once;
+            # pages written before the failure are found by the fresh lookup and patched
+            title_prop_name = notion_ensure_schema(token, db_id)
 
     return f"Notion upserts (deduped): {upserts}; skipped quality gate: {skipped_quality}"
 
@@ -444,10 +708,13 @@ def run(max_items: int, no_notion: bool, db_id: str):
     raw_items: List[Dict] = []
     diagnostics = []
 
-    for source, urls in SEARCH_URLS.items():
-        for url in urls:
+    # fetches are IO-bound and independent; collect in submission order so output stays stable
+    jobs = [(source, url) for source, urls in SEARCH_URLS.items() for url in urls]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(jobs) or 1)) as pool:
+        futures = [pool.submit(fetch_html, url) for _, url in jobs]
+        for (source, url), fut in zip(jobs, futures):
             try:
-                html = fetch_html(url)
+                html = fut.result()
                 items = parse_candidates(source, html, url)
                 diagnostics.append({"source": source, "url": url, "found": len(items)})
                 raw_items.extend(items)